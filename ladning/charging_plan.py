@@ -1,9 +1,12 @@
 from typing import List, Optional
 import datetime as dt
+import functools
 import math
 
-from ladning.constants import BATTERY_CAPACITY_KWH, CHARGING_KW_MAX, CHARGING_KW_END, APPROX_MAX_RANGE_KM, \
-    TAX_REFUND_DKK_KWH
+import numpy as np
+
+from ladning.constants import CHARGING_KW_MAX, CHARGING_KW_END, APPROX_MAX_RANGE_KM, TAX_REFUND_DKK_KWH, \
+    HOURS_PER_PERCENT_MAX, HOURS_PER_PERCENT_END
 from ladning.types import VehicleChargeState, HourlyPrice, ChargingPlan, ChargingRequest, ChargingRequestResponse, \
     EnergyNeed
 
@@ -15,7 +18,8 @@ def argmin(a: List[float]) -> int:
     :param a: The list to process
     :return: The index that corresponds to the minimum value in the input list
     """
-    return min(range(len(a)), key=lambda x: a[x], default=-1)
+    arr = np.asarray(a)
+    return -1 if arr.size == 0 else int(arr.argmin())
 
 
 def convolve_valid(signal1: List[float], signal2: List[float]) -> List[float]:
@@ -26,20 +30,13 @@ def convolve_valid(signal1: List[float], signal2: List[float]) -> List[float]:
     :param signal2: The second signal
     :return: The valid portion of the result of convolution
     """
-    len1 = len(signal1)
-    len2 = len(signal2)
-    valid_length = len1 - len2 + 1
-    if valid_length <= 0 or len2 == 0:
+    a = np.asarray(signal1, dtype=np.float64)
+    b = np.asarray(signal2, dtype=np.float64)
+    if a.size < b.size or b.size == 0:
         return []  # No valid portion
 
-    result = []
-    for i in range(valid_length):
-        conv_sum = 0
-        for j in range(len2):
-            conv_sum += signal1[i + j] * signal2[j]
-        result.append(conv_sum)
-
-    return result
+    # A matmul over a strided window view expresses the sliding dot product as a single BLAS call
+    return (np.lib.stride_tricks.sliding_window_view(a, b.size) @ b).tolist()
 
 
 def shift_fractional_forward(energy_need: EnergyNeed) -> EnergyNeed:
@@ -49,16 +46,15 @@ def shift_fractional_forward(energy_need: EnergyNeed) -> EnergyNeed:
     :param energy_need: The energy need to shift
     :return: The shifted energy need
     """
-    fractional_hour, full_hours = math.modf(energy_need.hours_required)
-    shift = energy_need.energy_signal[0] * fractional_hour
-    new_energy_signal = [shift]
-    for i in range(len(energy_need.energy_signal) - 1):
-        # Calculate what remains after previous shift
-        remaining = energy_need.energy_signal[i] - shift
+    fractional_hour = energy_need.hours_required - int(energy_need.hours_required)
+    signal = np.asarray(energy_need.energy_signal, dtype=np.float64)
 
-        # Calculate how much is possible to shift from next entry
-        shift = min(energy_need.energy_signal[i] - remaining, energy_need.energy_signal[i + 1])
-        new_energy_signal.append(remaining + shift)
+    # Unrolling the original element-wise recurrence shows that the amount shifted into entry i is the running
+    # minimum of [signal[0] * fractional_hour, signal[1], ..., signal[i]], which vectorizes as an accumulated minimum
+    shifts = np.minimum.accumulate(np.concatenate(([signal[0] * fractional_hour], signal[1:])))
+    new_energy_signal = np.empty_like(signal)
+    new_energy_signal[0] = shifts[0]
+    new_energy_signal[1:] = signal[:-1] - shifts[:-1] + shifts[1:]
 
     return EnergyNeed(energy_signal=new_energy_signal, hours_required=energy_need.hours_required)
 
@@ -76,10 +72,14 @@ def estimate_added_range(battery_state: int, target_state: int) -> float:
     return range_per_percentage * battery_diff
 
 
+@functools.lru_cache(maxsize=256)
 def calculate_energy_need(battery_state: int, target_state: int) -> Optional[EnergyNeed]:
     """
     Calculate the energy need required to charge from one battery state to the target battery state
 
+    Results are memoized on the integer battery states - the returned energy signal is marked read-only since the
+    cached object is shared between callers.
+
     :param battery_state: The starting battery state in the range [0, 100]
     :param target_state: The target battery state in the range [0, 100]
     :return: The energy need object, or None if no charging is required
@@ -93,44 +93,55 @@ def calculate_energy_need(battery_state: int, target_state: int) -> Optional[Ene
 
     if target_state < 95:
         # If target is below 95%, only consider the full charging speed
-        hours_required = ((target_state - battery_state) / 100.0) * BATTERY_CAPACITY_KWH / CHARGING_KW_MAX
+        hours_required = (target_state - battery_state) * HOURS_PER_PERCENT_MAX
 
         # The energy signal is 'CHARGING_KW_MAX' for the full hours, followed by 'CHARGING_KW_MAX' for a fractional part
         # of the last hour
-        fractional_hour, full_hours = math.modf(hours_required)
-        energy_signal = [CHARGING_KW_MAX] * int(full_hours) + [CHARGING_KW_MAX * fractional_hour]
+        full_hours = int(hours_required)
+        fractional_hour = hours_required - full_hours
+        energy_signal = np.full(full_hours + 1, CHARGING_KW_MAX, dtype=np.float64)
+        energy_signal[-1] = CHARGING_KW_MAX * fractional_hour
+        energy_signal.setflags(write=False)
         return EnergyNeed(energy_signal=energy_signal, hours_required=hours_required)
 
     # If charging above 95%, first charge at full rate to 95% ...
-    hours_required_to_95_percent = ((95 - battery_state) / 100.0) * BATTERY_CAPACITY_KWH / CHARGING_KW_MAX
+    hours_required_to_95_percent = (95 - battery_state) * HOURS_PER_PERCENT_MAX
 
     # ... then charge the remaining 5% at a lower rate
-    hours_required_from_95_percent = ((target_state - 95) / 100.0) * BATTERY_CAPACITY_KWH / CHARGING_KW_END
+    hours_required_from_95_percent = (target_state - 95) * HOURS_PER_PERCENT_END
 
-    energy_signal: List[float] = []
+    signal_parts: List[np.ndarray] = []
     hours_required = 0
     if hours_required_to_95_percent > 0:
         hours_required += hours_required_to_95_percent
-        fractional_hour_to_95, full_hours_to_95 = math.modf(hours_required_to_95_percent)
-        energy_signal.extend([CHARGING_KW_MAX] * int(full_hours_to_95))
+        full_hours_to_95 = int(hours_required_to_95_percent)
+        fractional_hour_to_95 = hours_required_to_95_percent - full_hours_to_95
+        max_rate_part = np.full(full_hours_to_95 + (1 if fractional_hour_to_95 > 0 else 0), CHARGING_KW_MAX,
+                                dtype=np.float64)
         if fractional_hour_to_95 > 0:
-            energy_signal.append(CHARGING_KW_MAX * fractional_hour_to_95)
+            max_rate_part[-1] = CHARGING_KW_MAX * fractional_hour_to_95
+        signal_parts.append(max_rate_part)
     if hours_required_from_95_percent > 0:
         hours_required += hours_required_from_95_percent
 
         # Modify existing fractional energy signal entry according to lower charge rate (for the remaining time)
-        if len(energy_signal) > 0:
-            available_time = 1.0 - math.modf(hours_required_to_95_percent)[0]
+        if len(signal_parts) > 0:
+            available_time = 1.0 - fractional_hour_to_95
             used_time = min(available_time, hours_required_from_95_percent)
-            energy_signal[-1] += used_time * CHARGING_KW_END
+            signal_parts[-1][-1] += used_time * CHARGING_KW_END
             hours_required_from_95_percent -= used_time
 
         # Add remaining reduced energy signal entries
-        fractional_hour_from_95, full_hours_from_95 = math.modf(hours_required_from_95_percent)
-        energy_signal.extend([CHARGING_KW_END] * int(full_hours_from_95))
+        full_hours_from_95 = int(hours_required_from_95_percent)
+        fractional_hour_from_95 = hours_required_from_95_percent - full_hours_from_95
+        end_rate_part = np.full(full_hours_from_95 + (1 if fractional_hour_from_95 > 0 else 0), CHARGING_KW_END,
+                                dtype=np.float64)
         if fractional_hour_from_95 > 0.0:
-            energy_signal.append(CHARGING_KW_END * fractional_hour_from_95)
+            end_rate_part[-1] = CHARGING_KW_END * fractional_hour_from_95
+        signal_parts.append(end_rate_part)
 
+    energy_signal = np.concatenate(signal_parts) if signal_parts else np.empty(0, dtype=np.float64)
+    energy_signal.setflags(write=False)
     return EnergyNeed(energy_signal=energy_signal, hours_required=hours_required)
 
 
@@ -148,60 +159,60 @@ def create_charging_plan(vehicle_charge_state: VehicleChargeState, hourly_prices
     if maybe_energy_need is None:
         return ChargingRequestResponse(False, reason="Vehicle battery level already at or above target", plan=None)
     energy_need = maybe_energy_need
+    hours_required = energy_need.hours_required
 
-    # Determine valid hourly prices
-    hourly_prices_valid = []
-    for p in hourly_prices:
-        # Disregard hours fully in the past (ongoing hour is valid) ...
-        valid = p.start >= dt.datetime.now().astimezone() - dt.timedelta(hours=1)
-        # ... and disregard hourly prices later than the charging request's end time if applicable ...
-        if charging_request.ready_by is not None:
-            valid &= p.start + dt.timedelta(hours=1) <= charging_request.ready_by
-        if valid:
-            hourly_prices_valid.append(p)
+    # Cheap infeasibility check before any array conversion - even with every hour valid there is no room for a plan
+    if len(hourly_prices) < math.ceil(hours_required):
+        return ChargingRequestResponse(False, reason="Not enough time to charge to the requested level", plan=None)
+
+    # The hourly prices are sorted by start time, so the valid range (hours not fully in the past, and - if a ready by
+    # time applies - hours ending at or before it) reduces to two binary-searched boundaries on the start timestamps
+    starts = np.array([p.start.timestamp() for p in hourly_prices], dtype=np.float64)
+    now_ts = dt.datetime.now().astimezone().timestamp()
+    lo = int(np.searchsorted(starts, now_ts - 3600.0))
+    if charging_request.ready_by is not None:
+        hi = int(np.searchsorted(starts, charging_request.ready_by.timestamp() - 3600.0, side="right"))
+    else:
+        hi = len(starts)
 
     # Check if a sufficient amount of hours exists for the ready by time to be honored
-    if len(hourly_prices_valid) < math.ceil(energy_need.hours_required):
+    if hi - lo < math.ceil(hours_required):
         return ChargingRequestResponse(False, reason="Not enough time to charge to the requested level", plan=None)
 
     # Pick cheapest consecutive hours for charging
     # This yields the total price for starting at time N and finishing the required M hours later
     # Note that the array is shorter than the input array by M due to not being able to sum past the end of the array
-    prices_after_refund = [p.price_kwh_dkk - TAX_REFUND_DKK_KWH for p in hourly_prices_valid]
-    full_hour_total_prices = convolve_valid(prices_after_refund, energy_need.energy_signal)
+    prices_after_refund = np.array([p.price_kwh_dkk for p in hourly_prices], dtype=np.float64) - TAX_REFUND_DKK_KWH
     partial_hour_energy_need = shift_fractional_forward(energy_need)
-    partial_hour_total_prices = convolve_valid(prices_after_refund, partial_hour_energy_need.energy_signal)
+
+    # Stack the two strategy kernels (row 0: full hour, row 1: partial hour) and compute both sliding dot products
+    # with a single matrix multiplication over a strided window view of the valid slice of the prices
+    kernels = np.array([energy_need.energy_signal, partial_hour_energy_need.energy_signal], dtype=np.float64)
+    signal_length = kernels.shape[1]
+    if hi - lo < signal_length:
+        return ChargingRequestResponse(False, reason="Not enough time to charge to the requested level", plan=None)
+    windows = np.lib.stride_tricks.sliding_window_view(prices_after_refund[lo:hi], signal_length)
 
     # Estimate the added range in km
     range_added = estimate_added_range(vehicle_charge_state.battery_level, charging_request.battery_target)
 
-    # Check which hourly strategy yields the lowest total price
-    if min(full_hour_total_prices) <= min(partial_hour_total_prices):
-        # Full hour strategy works best
-        start_idx = argmin(full_hour_total_prices)
-        start_time = hourly_prices_valid[start_idx].start
-        end_time = start_time + dt.timedelta(hours=energy_need.hours_required)
-        return ChargingRequestResponse(success=True, reason="",
-                                       plan=ChargingPlan(start_time=start_time, end_time=end_time,
-                                                         battery_start=vehicle_charge_state.battery_level,
-                                                         battery_end=charging_request.battery_target,
-                                                         total_cost_dkk=min(full_hour_total_prices),
-                                                         range_added_km=range_added
-                                                         ))
-    else:
-        # Partial hour strategy works best
-        start_idx = argmin(partial_hour_total_prices)
-        starting_hour = hourly_prices_valid[start_idx].start
+    # Check which hourly strategy yields the lowest total price - the stacked candidate arrays allow picking both
+    # the strategy and the starting hour with a single reduction
+    stacked_prices = kernels @ windows.T
+    strategy, start_idx = np.unravel_index(int(stacked_prices.argmin()), stacked_prices.shape)
+    total_cost = float(stacked_prices[strategy, start_idx])
 
-        # Determine how many minutes into the hour to start
-        hourly_fraction = math.modf(energy_need.hours_required)[0]
+    start_time = hourly_prices[lo + start_idx].start
+    if strategy == 1:
+        # Partial hour strategy works best - determine how many minutes into the hour to start
+        hourly_fraction = hours_required - int(hours_required)
         minutes_into_hour = (1.0 - hourly_fraction) * 60.0
-        start_time = starting_hour + dt.timedelta(minutes=minutes_into_hour)
-        end_time = start_time + dt.timedelta(hours=energy_need.hours_required)
-        return ChargingRequestResponse(success=True, reason="",
-                                       plan=ChargingPlan(start_time=start_time, end_time=end_time,
-                                                         battery_start=vehicle_charge_state.battery_level,
-                                                         battery_end=charging_request.battery_target,
-                                                         total_cost_dkk=min(partial_hour_total_prices),
-                                                         range_added_km=range_added
-                                                         ))
+        start_time += dt.timedelta(minutes=minutes_into_hour)
+    end_time = start_time + dt.timedelta(hours=hours_required)
+    return ChargingRequestResponse(success=True, reason="",
+                                   plan=ChargingPlan(start_time=start_time, end_time=end_time,
+                                                     battery_start=vehicle_charge_state.battery_level,
+                                                     battery_end=charging_request.battery_target,
+                                                     total_cost_dkk=total_cost,
+                                                     range_added_km=range_added
+                                                     ))
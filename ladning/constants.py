@@ -4,3 +4,5 @@ CHARGING_KW_MAX = 10.6  # Observed Easee Lite realistic charging speed until 95%
 CHARGING_KW_END = 7.6  # Observed Easee Lite realistic charging speed after 95%+ SoC
 APPROX_MAX_RANGE_KM = 450  # Realistic Tesla Model 3 Highland RWD range on highways
 TAX_REFUND_DKK_KWH = 0.94  # Danish tax refund per kWh in DKK
+HOURS_PER_PERCENT_MAX = BATTERY_CAPACITY_KWH / CHARGING_KW_MAX / 100.0  # Hours needed to charge 1% at the full rate
+HOURS_PER_PERCENT_END = BATTERY_CAPACITY_KWH / CHARGING_KW_END / 100.0  # Hours needed to charge 1% at the reduced rate
@@ -1,9 +1,19 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import operator
+import threading
 
 from ladning.types import HourlyPrice
 import datetime as dt
 import requests
 
+# Shared session so that the hourly fetches reuse the pooled TLS connection instead of re-handshaking every time
+_session = requests.Session()
+
+# Cache of the most recently fetched prices, keyed by the hour they were fetched in. Spot prices only change when a
+# new hour of data is published, so repeat callers within the same hour can skip the HTTPS round-trip entirely.
+_price_cache_lock = threading.Lock()
+_price_cache: Optional[Tuple[dt.datetime, List[HourlyPrice]]] = None
+
 
 def next_datetime_at_hour(current: dt.datetime, hour: int, minutes: int = 0) -> dt.datetime:
     repl = current.replace(hour=hour, minute=minutes, second=0, microsecond=0)
@@ -18,22 +28,37 @@ def get_energy_prices() -> List[HourlyPrice]:
 
     See https://www.bolius.dk/elpriser for more info.
 
+    Results are cached for the remainder of the hour they were fetched in - the lock ensures that the webservice
+    thread and the asyncio loop cannot both trigger a refresh at the same time.
+
     :return: The hourly energy prices from now until the most recently published price
     """
     endpoint = "https://api.bolius.dk/livedata/v2/type/power"
     price_area = "DK2"  # Price area for Sealand and Copenhagen
-    date_start_str = dt.datetime.now().astimezone().strftime("%Y-%m-%dT%H:00")
-    date_end_str = next_datetime_at_hour(dt.datetime.now() + dt.timedelta(days=1), hour=23,
-                                         minutes=59).astimezone().strftime("%Y-%m-%dT%H:%M")
-    url = f"{endpoint}?region={price_area}&start={date_start_str}&end={date_end_str}"
-    records = requests.get(url).json()["data"]
-
-    def _convert(record: Dict[str, Any]) -> HourlyPrice:
-        start = (dt.datetime.strptime(record["date"], "%Y-%m-%d") +
-                 dt.timedelta(hours=record["hour"])).astimezone()
-        price_kwh_dkk = float(record["price"])
-        return HourlyPrice(start=start, price_kwh_dkk=price_kwh_dkk)
-
-    # Sort hourly prices by datetime (first entry is closest to current time)
-    hourly_prices = sorted([_convert(r) for r in records], key=lambda p: p.start)
+    now = dt.datetime.now().astimezone()
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+
+    global _price_cache
+    with _price_cache_lock:
+        if _price_cache is not None and _price_cache[0] == current_hour:
+            return _price_cache[1]
+
+        date_start_str = now.strftime("%Y-%m-%dT%H:00")
+        date_end_str = next_datetime_at_hour(now + dt.timedelta(days=1), hour=23,
+                                             minutes=59).strftime("%Y-%m-%dT%H:%M")
+        url = f"{endpoint}?region={price_area}&start={date_start_str}&end={date_end_str}"
+        records = _session.get(url, timeout=30).json()["data"]
+
+        def _convert(record: Dict[str, Any]) -> HourlyPrice:
+            start = (dt.datetime.fromisoformat(record["date"]) +
+                     dt.timedelta(hours=record["hour"])).astimezone()
+            price_kwh_dkk = float(record["price"])
+            return HourlyPrice(start=start, price_kwh_dkk=price_kwh_dkk)
+
+        # The API returns records in chronological order (first entry is closest to current time) - verify that with
+        # a linear scan and only pay for a sort if the assumption is ever broken
+        hourly_prices = [_convert(r) for r in records]
+        if any(a.start > b.start for a, b in zip(hourly_prices, hourly_prices[1:])):
+            hourly_prices.sort(key=operator.attrgetter("start"))
+        _price_cache = (current_hour, hourly_prices)
     return hourly_prices
@@ -1,10 +1,16 @@
 import dataclasses
 import datetime as dt
-from typing import Optional, List
+from typing import Optional
+
+import numpy as np
+
+# Note: __slots__ is declared manually on these classes rather than via dataclass(slots=True), which would require
+# Python 3.10+ (CI runs 3.9). None of the fields have defaults, so the two spellings are equivalent.
 
 
 @dataclasses.dataclass
 class VehicleChargeState:
+    __slots__ = ("battery_level", "range_km", "minutes_to_full_charge")
     battery_level: int
     range_km: float
     minutes_to_full_charge: int
@@ -12,12 +18,14 @@ class VehicleChargeState:
 
 @dataclasses.dataclass
 class HourlyPrice:
+    __slots__ = ("start", "price_kwh_dkk")
     start: dt.datetime
     price_kwh_dkk: float
 
 
 @dataclasses.dataclass
 class ChargingPlan:
+    __slots__ = ("start_time", "end_time", "battery_start", "battery_end", "total_cost_dkk", "range_added_km")
     start_time: dt.datetime
     end_time: dt.datetime
     battery_start: int
@@ -28,18 +36,21 @@ class ChargingPlan:
 
 @dataclasses.dataclass
 class EnergyNeed:
-    energy_signal: List[float]
+    __slots__ = ("energy_signal", "hours_required")
+    energy_signal: np.ndarray
     hours_required: float
 
 
 @dataclasses.dataclass
 class ChargingRequest:
+    __slots__ = ("battery_target", "ready_by")
     battery_target: int  # The battery level to charge to
     ready_by: Optional[dt.datetime]  # The date/time by which the charging should have reached the target battery level
 
 
 @dataclasses.dataclass
 class ChargingRequestResponse:
+    __slots__ = ("success", "reason", "plan")
     success: bool  # Whether the charging request could be honored
     reason: str  # Reason that the charging request could not be honored (empty on success)
     plan: Optional[ChargingPlan]  # The created charging plan (None if not successful)
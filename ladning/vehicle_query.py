@@ -1,23 +1,40 @@
+from typing import Optional, Tuple
+import threading
+import time
+
 import teslapy
 
 from ladning.constants import MILES_TO_KILOMETERS
 from ladning.logging import log
 from ladning.types import VehicleChargeState
 
+# Cache the most recent charge state for a short while - the Tesla cloud API is slow (seconds when the car is awake,
+# much longer if a wake-up is needed), and bursts of charger state transitions would otherwise hit it repeatedly
+_CACHE_TTL_SECONDS = 60.0
+_cache_lock = threading.Lock()
+_cached_state: Optional[Tuple[float, VehicleChargeState]] = None
+
 
 def get_vehicle_charge_state(tesla: teslapy.Tesla, allow_wakeup: bool = False) -> VehicleChargeState:
-    vehicles = tesla.vehicle_list()
-    if len(vehicles) != 1:
-        raise RuntimeError(f"Expected a single vehicle, got {len(vehicles)}")
-    vehicle = vehicles[0]
-    if vehicle["state"] == "asleep" or vehicle["state"] == "offline":
-        if allow_wakeup:
-            log.warning(f"Waking up car to get battery level")
-            vehicle.sync_wake_up()
-        else:
-            raise RuntimeError("Car is asleep and wakeup wasn't allowed")
-    charge_state = vehicle['charge_state']
-    battery_level = charge_state['battery_level']
-    range_km = charge_state['battery_range'] * MILES_TO_KILOMETERS
-    minutes_to_full_charge = charge_state['minutes_to_full_charge']
-    return VehicleChargeState(battery_level, range_km, minutes_to_full_charge)
+    global _cached_state
+    with _cache_lock:
+        if _cached_state is not None and time.monotonic() - _cached_state[0] < _CACHE_TTL_SECONDS:
+            return _cached_state[1]
+
+        vehicles = tesla.vehicle_list()
+        if len(vehicles) != 1:
+            raise RuntimeError(f"Expected a single vehicle, got {len(vehicles)}")
+        vehicle = vehicles[0]
+        if vehicle["state"] == "asleep" or vehicle["state"] == "offline":
+            if allow_wakeup:
+                log.warning(f"Waking up car to get battery level")
+                vehicle.sync_wake_up()
+            else:
+                raise RuntimeError("Car is asleep and wakeup wasn't allowed")
+        charge_state = vehicle['charge_state']
+        battery_level = charge_state['battery_level']
+        range_km = charge_state['battery_range'] * MILES_TO_KILOMETERS
+        minutes_to_full_charge = charge_state['minutes_to_full_charge']
+        vehicle_charge_state = VehicleChargeState(battery_level, range_km, minutes_to_full_charge)
+        _cached_state = (time.monotonic(), vehicle_charge_state)
+    return vehicle_charge_state
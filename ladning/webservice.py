@@ -1,5 +1,6 @@
+import functools
 import threading
-from typing import List, Callable, Optional
+from typing import List, Callable, Optional, Tuple
 
 import datetime as dt
 from flask import Flask, jsonify, Response, request
@@ -10,6 +11,9 @@ from ladning.logging import log
 from ladning.types import HourlyPrice, ChargingPlan, ChargingRequest, ChargingRequestResponse
 from dataclasses import asdict
 
+# Dashboards tend to re-post the same ready_by value, so cache the parse (including its timezone validation input)
+_parse_iso_datetime = functools.lru_cache(maxsize=256)(dt.datetime.fromisoformat)
+
 
 class LadningService:
     def __init__(self, host: str, port: int, electricity_price_getter: Callable[[], List[HourlyPrice]],
@@ -19,6 +23,11 @@ class LadningService:
         self._charging_plan_getter = charging_plan_getter
         self._charging_request_setter = charging_request_setter
 
+        # Cache the serialized hourly prices keyed on list identity - a new list instance is only published when
+        # prices actually change (at most hourly), while the dashboard polls much more often. Source and dicts are
+        # held in a single tuple so concurrent waitress workers always see a matching pair
+        self._cached_prices: Tuple[Optional[List[HourlyPrice]], List[dict]] = (None, [])
+
         # Create Flask application
         self._service = Flask("ladning")
 
@@ -28,7 +37,7 @@ class LadningService:
         # Add API endpoints
         self._service.add_url_rule("/electricity", "electricity", self.electricity, methods=["GET"])
         self._service.add_url_rule("/charging_request", "charging_request", self.charging_request, methods=["POST"])
-        self._server = waitress.create_server(self._service, host=host, port=port, threads=1)
+        self._server = waitress.create_server(self._service, host=host, port=port, threads=4)
         self._server_thread = threading.Thread(target=self._server.run, name="server_thread", daemon=True)
 
     @property
@@ -55,9 +64,14 @@ class LadningService:
         """
         hourly_prices = self._electricity_price_getter()
         charging_plan = self._charging_plan_getter()
+        cached_source, price_dicts = self._cached_prices
+        if hourly_prices is not cached_source:
+            # Build the dicts by direct field access - asdict recurses through copy.deepcopy per instance
+            price_dicts = [dict(start=p.start, price_kwh_dkk=p.price_kwh_dkk) for p in hourly_prices]
+            self._cached_prices = (hourly_prices, price_dicts)
         combined = dict(
             charging_plan=None if charging_plan is None else asdict(charging_plan),
-            hourly_prices=[asdict(p) for p in hourly_prices]
+            hourly_prices=price_dicts
         )
         return jsonify(combined)
 
@@ -65,7 +79,7 @@ class LadningService:
         # Convert POST data to Python dataclass
         try:
             data = request.json
-            ready_by = dt.datetime.fromisoformat(data["ready_by"])
+            ready_by = _parse_iso_datetime(data["ready_by"])
             if ready_by.tzinfo is None:
                 return Response("ready_by datetime must have timezone information")
             charging_request = ChargingRequest(battery_target=int(data["battery_target"]),
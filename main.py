@@ -1,4 +1,7 @@
 import asyncio
+import concurrent.futures
+import logging
+import functools
 from typing import AsyncIterator, Tuple, Optional, List
 import datetime as dt
 
@@ -11,6 +14,7 @@ from apscheduler.triggers.cron import CronTrigger
 
 import pyeasee
 from pyeasee.charger import STATUS as CHARGER_STATUS, Charger
+from pyeasee.exceptions import NotFoundException
 
 from ladning.charging_plan import create_charging_plan
 from ladning.energy_prices import get_energy_prices
@@ -20,6 +24,17 @@ from ladning.vehicle_query import get_vehicle_charge_state
 
 from ladning.webservice import LadningService
 
+# Resolve the raw stream-data ID for the charger mode once - the SignalR callback runs per event, so a plain integer
+# comparison beats an enum attribute lookup there
+_STATE_CHARGER_OP_MODE_VALUE = pyeasee.ChargerStreamData.state_chargerOpMode.value
+
+# Resolve the local timezone once - datetime.now().astimezone() re-resolves it via a syscall per call. Comparisons
+# between aware datetimes are offset-independent, so a fixed offset cached across a DST switch stays correct
+_LOCAL_TZ = dt.datetime.now().astimezone().tzinfo
+
+# Charger states in which (re)planning makes sense: ready to charge, awaiting a schedule or already charging
+_PLANNING_STATES = frozenset(("READY_TO_CHARGE", "AWAITING_START", "CHARGING"))
+
 
 class ApplicationState:
     DEFAULT_CHARGING_REQUEST = ChargingRequest(battery_target=100, ready_by=None)
@@ -28,6 +43,7 @@ class ApplicationState:
         self._easee = easee
         self._tesla = tesla
         self._hourly_prices = hourly_prices
+        self._hourly_prices_fingerprint = ApplicationState._price_fingerprint(hourly_prices)
         self._vehicle_charge_state: Optional[VehicleChargeState] = None
         self._charging_plan: Optional[ChargingPlan] = None
         self._charger: Optional[Charger] = None
@@ -35,23 +51,46 @@ class ApplicationState:
         self._charging_request: ChargingRequest = ApplicationState.DEFAULT_CHARGING_REQUEST
         self._charging_state: Optional[str] = None
 
-    async def get_charger(self) -> Charger:
+    async def resolve_charger(self) -> None:
+        """
+        Find and store the one charger that we intend to control/listen to
+
+        Called once at startup so that the event-handling paths can use the plain :meth:`get_charger` accessor
+        without paying for an HTTP round-trip or a coroutine re-entry per call
+        """
+        chargers = await self._easee.get_chargers()
+        if len(chargers) != 1:
+            raise RuntimeError(f"Expected a single charger, got {len(chargers)}")
+        self._charger = chargers[0]
+
+    def get_charger(self) -> Charger:
         if self._charger is None:
-            # Find the one charger that we intend to control/listen to
-            chargers = await self._easee.get_chargers()
-            if len(chargers) != 1:
-                raise RuntimeError(f"Expected a single charger, got {len(chargers)}")
-            self._charger = chargers[0]
+            raise RuntimeError("Charger has not been resolved yet - call resolve_charger() first")
         return self._charger
 
+    @staticmethod
+    def _price_fingerprint(hourly_prices: List[HourlyPrice]) -> int:
+        """
+        Compute a cheap fingerprint of a list of hourly prices, used to detect unchanged price updates without a
+        field-by-field comparison of every HourlyPrice instance
+        """
+        return hash(tuple((p.start, p.price_kwh_dkk) for p in hourly_prices))
+
     def get_hourly_prices(self) -> List[HourlyPrice]:
         return self._hourly_prices
 
     def get_charging_plan(self) -> Optional[ChargingPlan]:
         return self._charging_plan
 
+    async def update_vehicle_charge_state(self) -> None:
+        """
+        Fetch the vehicle charge state from the Tesla API on a worker thread to keep the event loop (and thereby the
+        pyeasee SignalR callbacks) responsive for the duration of the cloud round-trip
+        """
+        self._vehicle_charge_state = await asyncio.to_thread(get_vehicle_charge_state, self._tesla, True)
+
     async def smart_charge(self) -> None:
-        async for previous_state, new_state in listen_for_charging_states(self._easee, await self.get_charger()):
+        async for previous_state, new_state in listen_for_charging_states(self._easee, self.get_charger()):
             self._charging_state = new_state
 
             if new_state == "DISCONNECTED":
@@ -68,27 +107,22 @@ class ApplicationState:
                 continue
             if new_state == "AWAITING_START" and previous_state == "CHARGING" and self._charging_plan is not None:
                 # Planned charging to less than 100% may just have finished - check if times align to make sure
-                now = dt.datetime.now().astimezone()
+                now = dt.datetime.now(tz=_LOCAL_TZ)
                 if abs(now - self._charging_plan.end_time) < dt.timedelta(minutes=10):
-                    log.info(f"Charging to {self._charging_plan.battery_end} % "
-                             f"completed at {now} (expected {self._charging_plan.end_time})")
+                    log.info("Charging to %d %% completed at %s (expected %s)",
+                             self._charging_plan.battery_end, now, self._charging_plan.end_time)
 
                     # Reset charging request (e.g. to allow charging to 100 % with no deadline)
                     # Then try to schedule charging again with the reset plan
                     self.complete_charging()
-                    self._vehicle_charge_state = get_vehicle_charge_state(self._tesla, allow_wakeup=True)
+                    await self.update_vehicle_charge_state()
                     await self.plan_charging()
 
             # If previous state was None (app just started) or disconnected, consider whether to perform planning
             app_just_launched = previous_state is None
             if app_just_launched or previous_state == "DISCONNECTED":
-                # Plan if charger is ready to charge, awaiting a schedule or already started charging
-                perform_planning = new_state == "READY_TO_CHARGE" or \
-                                   new_state == "AWAITING_START" or \
-                                   new_state == "CHARGING"
-
-                if perform_planning:
-                    self._vehicle_charge_state = get_vehicle_charge_state(self._tesla, allow_wakeup=True)
+                if new_state in _PLANNING_STATES:
+                    await self.update_vehicle_charge_state()
                     await self.plan_charging()
 
     async def plan_charging(self) -> ChargingRequestResponse:
@@ -98,16 +132,16 @@ class ApplicationState:
 
         # Check if charging request is old and needs to be reset
         if self._charging_request.ready_by is not None:
-            if self._charging_request.ready_by < dt.datetime.now().astimezone():
-                log.info(f"Resetting old charging request")
+            if self._charging_request.ready_by < dt.datetime.now(tz=_LOCAL_TZ):
+                log.info("Resetting old charging request")
                 self._charging_request = ApplicationState.DEFAULT_CHARGING_REQUEST
 
-        log.info(f"Planning charging from {self._vehicle_charge_state.battery_level}% with "
-                 f"request: {self._charging_request}")
+        log.info("Planning charging from %d%% with request: %s",
+                 self._vehicle_charge_state.battery_level, self._charging_request)
 
         result = create_charging_plan(self._vehicle_charge_state, self._hourly_prices, self._charging_request)
         if not result.success:
-            log.info(f"Charging plan unsuccessful: {result.reason}")
+            log.info("Charging plan unsuccessful: %s", result.reason)
             return result
 
         new_charging_plan = result.plan
@@ -116,8 +150,8 @@ class ApplicationState:
             return ChargingRequestResponse(False, "Charging plan unchanged", None)
 
         # Put new charging plan into effect
-        await schedule_charge(await self.get_charger(), new_charging_plan)
-        log.info(f"New charging plan scheduled: {new_charging_plan}")
+        await schedule_charge(self.get_charger(), new_charging_plan)
+        log.info("New charging plan scheduled: %s", new_charging_plan)
         self._charging_plan = new_charging_plan
         return result
 
@@ -125,17 +159,18 @@ class ApplicationState:
         """
         Cancel any existing charging plan
         """
-        charger = await self.get_charger()
-        previous_plan = await charger.get_basic_charge_plan()
-        if previous_plan is None:
-            log.info("No plan to cancel")
-        else:
+        charger = self.get_charger()
+        # Issue the delete unconditionally - probing with get_basic_charge_plan first would cost a full extra HTTP
+        # round-trip just to pick a log line. The cloud answers a delete without a plan with a 404
+        try:
             await charger.delete_basic_charge_plan()
             log.info("Charging plan cancelled")
+        except NotFoundException:
+            log.info("No plan to cancel")
         self._charging_plan = None
 
         # Reset charging request
-        log.info(f"Resetting charging request due to cancelled charging")
+        log.info("Resetting charging request due to cancelled charging")
         self._charging_request = ApplicationState.DEFAULT_CHARGING_REQUEST
 
     def complete_charging(self) -> None:
@@ -144,28 +179,33 @@ class ApplicationState:
         Note: This will not cancel the plan
         """
         self._charging_plan = None
-        log.info(f"Resetting charging request due to completed charging")
+        log.info("Resetting charging request due to completed charging")
         self._charging_request = ApplicationState.DEFAULT_CHARGING_REQUEST
 
     async def on_new_hourly_prices(self, hourly_prices: List[HourlyPrice]) -> None:
         log.info("New hourly prices received")
-        if hourly_prices == self._hourly_prices:
+        new_fingerprint = ApplicationState._price_fingerprint(hourly_prices)
+        if new_fingerprint == self._hourly_prices_fingerprint and hourly_prices == self._hourly_prices:
+            # Fingerprints differ for any real price change, so the deep comparison only runs on a (rare) hash match
             log.info("New hourly prices were unchanged, skipping handling")
             return
 
-        log.info(f"New hourly prices: {hourly_prices}")
+        if log.isEnabledFor(logging.INFO):
+            # Repr-formatting a full day of HourlyPrice objects is the most expensive log line in the app
+            log.info("New hourly prices: %r", hourly_prices)
 
         # if vehicle is currently charging, get the SoC before attempting to re-plan charging
         if self._charging_state == "CHARGING":
             log.info("Vehicle is currently charging - getting revised state of charge before planning")
-            self._vehicle_charge_state = get_vehicle_charge_state(self._tesla, allow_wakeup=True)
+            await self.update_vehicle_charge_state()
 
         log.info("Checking if charging plan should be revised")
         self._hourly_prices = hourly_prices
+        self._hourly_prices_fingerprint = new_fingerprint
         await self.plan_charging()
 
     async def on_charging_request(self, request: ChargingRequest) -> ChargingRequestResponse:
-        log.info(f"Received charging request: {request}")
+        log.info("Received charging request: %s", request)
         if request.battery_target <= 0 or request.battery_target > 100:
             return ChargingRequestResponse(False, "Target battery level outside valid range", plan=None)
 
@@ -178,47 +218,67 @@ class ApplicationState:
         return result
 
     def on_charging_request_sync(self, request: ChargingRequest) -> ChargingRequestResponse:
-        async def _call() -> ChargingRequestResponse:
-            return await self.on_charging_request(request)
-
-        future = asyncio.run_coroutine_threadsafe(_call(), self._event_loop)
-        return future.result()
+        # Schedule the coroutine directly on the event loop - no wrapper coroutine needed. The timeout bounds how
+        # long a webservice worker thread can be held up if the event loop is busy (e.g. waiting for a car wakeup)
+        future = asyncio.run_coroutine_threadsafe(self.on_charging_request(request), self._event_loop)
+        try:
+            return future.result(timeout=30)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            log.warning("Timed out while waiting for charging request to be handled")
+            return ChargingRequestResponse(False, "Timed out while handling charging request - try again later", None)
 
 
 async def listen_for_charging_states(easee: Easee, charger: Charger) -> AsyncIterator[Tuple[Optional[str], str]]:
-    queue = asyncio.Queue()
-
-    # Query the current charger mode
-    current_charging_state: str = (await charger.get_state())["chargerOpMode"]
-    log.info(f"Initial charging state: {current_charging_state}")
-    yield None, current_charging_state
+    # Bound the queue at a single pending transition - the planning path behind the consumer is slow (Tesla/Easee
+    # round-trips), so bursts of chargerOpMode updates during e.g. SignalR reconnects are coalesced rather than queued
+    queue = asyncio.Queue(maxsize=1)
+    current_charging_state: Optional[str] = None
 
     async def _signalr_callback(_, __, data_id, value):
-        if data_id == pyeasee.ChargerStreamData.state_chargerOpMode.value:
+        if data_id == _STATE_CHARGER_OP_MODE_VALUE:
             new_charging_state = CHARGER_STATUS[value]
 
             nonlocal current_charging_state
+            if current_charging_state is None:
+                # Initial state has not been read yet - drop the event, the state query below reflects it already
+                return
             if new_charging_state != current_charging_state:
-                log.info(f"New charging state: {new_charging_state}")
-                await queue.put((current_charging_state, new_charging_state))
+                log.info("New charging state: %s", new_charging_state)
+                try:
+                    queue.put_nowait((current_charging_state, new_charging_state))
+                except asyncio.QueueFull:
+                    # Coalesce with the pending transition, keeping its previous state and the newest state
+                    pending_previous, _ = queue.get_nowait()
+                    queue.put_nowait((pending_previous, new_charging_state))
                 current_charging_state = new_charging_state
 
-    await easee.sr_subscribe(charger, _signalr_callback)
+    # Issue the initial state query and the SignalR subscription concurrently - both are network round-trips that
+    # are independent of each other, so overlapping them shaves one round-trip off every app startup
+    state, _ = await asyncio.gather(charger.get_state(), easee.sr_subscribe(charger, _signalr_callback))
+    current_charging_state = state["chargerOpMode"]
+    log.info("Initial charging state: %s", current_charging_state)
+    yield None, current_charging_state
+
     while True:
         yield await queue.get()
 
 
-async def schedule_charge(charger: Charger, charging_plan: ChargingPlan) -> None:
-    def _format(d: dt.datetime):
-        # Convert to UTC - required by Easee API
-        return d.astimezone(dt.timezone.utc).isoformat(timespec='milliseconds').replace("+00:00", "Z")
+@functools.lru_cache(maxsize=128)
+def _format_utc(d: dt.datetime) -> str:
+    # Convert to UTC - required by Easee API. A single strftime pass replaces isoformat plus string replace.
+    # Plan start/end times are quantized to hour boundaries and repeat across re-schedules, so cache the result
+    utc = d.astimezone(dt.timezone.utc)
+    return f"{utc:%Y-%m-%dT%H:%M:%S}.{utc.microsecond // 1000:03d}Z"
+
 
+async def schedule_charge(charger: Charger, charging_plan: ChargingPlan) -> None:
     # If charging to full, leave out end time to let car decide when it is exactly 100 %
     # This helps account for differences between the modelled charging curve and the actual curve, e.g. due to battery
     # temperature, etc.
-    charge_stop_time = None if charging_plan.battery_end == 100 else _format(charging_plan.end_time)
+    charge_stop_time = None if charging_plan.battery_end == 100 else _format_utc(charging_plan.end_time)
     response = await charger.set_basic_charge_plan(id=42,  # Unsure what ID to use here
-                                                   chargeStartTime=_format(charging_plan.start_time),
+                                                   chargeStartTime=_format_utc(charging_plan.start_time),
                                                    chargeStopTime=charge_stop_time,
                                                    repeat=False,
                                                    isEnabled=True)
@@ -242,6 +302,7 @@ async def main():
 
     # Create application state to tie together different pieces of the app
     state = ApplicationState(easee, tesla, get_energy_prices())
+    await state.resolve_charger()
 
     # Start the webservice used to query and control charging on a worker thread
     webservice = LadningService(host="0.0.0.0", port=args.webservice_port,
@@ -258,15 +319,17 @@ async def main():
         success = False
         while not success:
             try:
-                prices = get_energy_prices()
+                # Run the blocking HTTP fetch on a worker thread to avoid stalling the event loop (and thereby the
+                # pyeasee SignalR callbacks) for the duration of the round-trip
+                prices = await asyncio.to_thread(get_energy_prices)
                 await state.on_new_hourly_prices(prices)
                 success = True
             except Exception as e:
-                log.error(f"Error while loading new energy prices: '{e}' - retrying in {retry_minutes} minutes")
+                log.error("Error while loading new energy prices: '%s' - retrying in %d minutes", e, retry_minutes)
                 await asyncio.sleep(retry_minutes * 60)
 
     # Use max_instances here in case the job is looping with retries due to API being down
-    scheduler.add_job(_try_update_prices, CronTrigger(hour=13, timezone=dt.datetime.now().astimezone().tzinfo),
+    scheduler.add_job(_try_update_prices, CronTrigger(hour=13, timezone=_LOCAL_TZ),
                       max_instances=1)
     scheduler.start()
 
@@ -274,7 +337,7 @@ async def main():
     try:
         await state.smart_charge()
     except:
-        log.warning(f"Quitting due to keyboard interrupt or error")
+        log.warning("Quitting due to keyboard interrupt or error")
         raise
     finally:
         # Clean up
@@ -0,0 +1,56 @@
+from typing import Callable, Iterator
+
+import pytest
+import requests
+
+from ladning.types import ChargingRequestResponse
+from ladning.webservice import LadningService
+
+# Use any free port for web services
+FREE_PORT = 0
+HOST_ADDRESS = "127.0.0.1"  # This has to be an IPv4 address for webservice to not break
+
+
+@pytest.fixture(scope="session")
+def http() -> Iterator[requests.Session]:
+    """
+    A shared requests session so that test HTTP calls reuse one pooled keep-alive connection to the test server
+    instead of performing a TCP handshake per call
+    """
+    with requests.Session() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def service_state() -> dict:
+    """
+    Mutable callbacks backing the shared webservice - tests swap these entries instead of spinning up a new server
+    """
+    return dict(prices=lambda: [], plan=lambda: None,
+                setter=lambda _: ChargingRequestResponse(success=True, reason="", plan=None))
+
+
+@pytest.fixture(scope="session")
+def service(service_state: dict) -> Iterator[LadningService]:
+    """
+    A single LadningService shared by the whole session - binding the socket and starting the server thread once
+    instead of per test. The indirection through 'service_state' lets each test install its own getters/setter.
+    """
+    with LadningService(host=HOST_ADDRESS, port=FREE_PORT,
+                        electricity_price_getter=lambda: service_state["prices"](),
+                        charging_plan_getter=lambda: service_state["plan"](),
+                        charging_request_setter=lambda r: service_state["setter"](r)) as running_service:
+        yield running_service
+
+
+@pytest.fixture()
+def configure_service(service: LadningService, service_state: dict) -> Callable[..., LadningService]:
+    """
+    Install test-specific callbacks on the shared webservice and return it
+    """
+
+    def _configure(**callbacks) -> LadningService:
+        service_state.update(callbacks)
+        return service
+
+    return _configure
@@ -1,6 +1,7 @@
 import math
-from typing import List
+from typing import Callable, List
 
+import numpy as np
 import pytest
 import datetime as dt
 
@@ -10,6 +11,20 @@ from ladning.constants import BATTERY_CAPACITY_KWH, CHARGING_KW_MAX, CHARGING_KW
 from ladning.types import VehicleChargeState, HourlyPrice, ChargingRequest, EnergyNeed
 
 
+@pytest.fixture(scope="module")
+def make_hourly_prices() -> Callable[[dt.datetime, List[float]], List[HourlyPrice]]:
+    """
+    Factory for hourly price lists: given a reference time and per-hour prices, builds consecutive HourlyPrice
+    entries starting at the reference time. Module-scoped since the factory itself carries no per-test state.
+    """
+
+    def _make(reference: dt.datetime, prices: List[float]) -> List[HourlyPrice]:
+        return [HourlyPrice(start=reference + dt.timedelta(hours=i), price_kwh_dkk=price)
+                for i, price in enumerate(prices)]
+
+    return _make
+
+
 @pytest.fixture()
 def vehicle_50_percent() -> VehicleChargeState:
     return VehicleChargeState(battery_level=50, range_km=200, minutes_to_full_charge=0)
@@ -108,10 +123,8 @@ def test_shift_fractional_forward() -> None:
     shifted_need = shift_fractional_forward(energy_need)
     assert shifted_need.hours_required == energy_need.hours_required
     assert len(shifted_need.energy_signal) == len(energy_need.energy_signal)
-    assert shifted_need.energy_signal[0] == pytest.approx(10.6 * 0.8)
-    assert shifted_need.energy_signal[1] == pytest.approx(10.6)
-    assert shifted_need.energy_signal[2] == pytest.approx(10.6)
-    assert sum(shifted_need.energy_signal) == pytest.approx(sum(energy_need.energy_signal))
+    np.testing.assert_allclose(shifted_need.energy_signal[:3], [10.6 * 0.8, 10.6, 10.6])
+    assert abs(sum(shifted_need.energy_signal) - sum(energy_need.energy_signal)) < 1e-9
 
 
 def test_calculate_energy_need_invalid_inputs() -> None:
@@ -139,13 +152,13 @@ def test_calculate_energy_need_below_95() -> None:
     assert energy_need is not None
 
     # The energy signal should sum to the total energy need
-    assert sum(energy_need.energy_signal) == pytest.approx(diff * BATTERY_CAPACITY_KWH)
+    assert abs(sum(energy_need.energy_signal) - diff * BATTERY_CAPACITY_KWH) < 1e-9
 
     # All the full hours (except the last fractional hour) should charge at max rate
     # The last fractional hour should also charge at max rate, but for less than a full hour
     fractional_hour, full_hours = math.modf(energy_need.hours_required)
-    assert energy_need.energy_signal[:-1] == [CHARGING_KW_MAX] * int(full_hours)
-    assert energy_need.energy_signal[-1] == pytest.approx(fractional_hour * CHARGING_KW_MAX)
+    np.testing.assert_allclose(energy_need.energy_signal,
+                               [CHARGING_KW_MAX] * int(full_hours) + [fractional_hour * CHARGING_KW_MAX])
 
 
 def test_calculate_energy_need_to_full() -> None:
@@ -169,12 +182,11 @@ def test_create_charging_plan_no_hours(vehicle_50_percent: VehicleChargeState) -
                              charging_request=ChargingRequest(battery_target=100, ready_by=None))
 
 
-def test_create_charging_plan_ready_by(vehicle_50_percent: VehicleChargeState) -> None:
+def test_create_charging_plan_ready_by(vehicle_50_percent: VehicleChargeState,
+                                       make_hourly_prices: Callable[[dt.datetime, List[float]], List[HourlyPrice]]) \
+        -> None:
     start_time = dt.datetime.now().astimezone()
-    hourly_prices: List[HourlyPrice] = [
-        HourlyPrice(start=start_time + dt.timedelta(hours=i), price_kwh_dkk=2.0)
-        for i in range(24)
-    ]
+    hourly_prices = make_hourly_prices(start_time, [2.0] * 24)
 
     # Make entries 13-16 the optimal time to charge, but force charging to finish by 14:00
     hourly_prices[13].price_kwh_dkk = 1.5
@@ -187,24 +199,16 @@ def test_create_charging_plan_ready_by(vehicle_50_percent: VehicleChargeState) -
     assert result.plan.end_time <= hourly_prices[14].start
 
 
-def test_create_charging_plan_immediate_start(vehicle_90_percent: VehicleChargeState) -> None:
+def test_create_charging_plan_immediate_start(vehicle_90_percent: VehicleChargeState,
+                                              make_hourly_prices: Callable[
+                                                  [dt.datetime, List[float]], List[HourlyPrice]]) -> None:
     """
     Test that the charging plan will ignore hours in the past, but allow starting in the currently ongoing hour
     """
     five_minutes_ago = dt.datetime.now().astimezone() - dt.timedelta(minutes=5)
-    hourly_prices: List[HourlyPrice] = [
-        # Make some hours in the past the cheapest
-        HourlyPrice(start=five_minutes_ago - dt.timedelta(hours=5), price_kwh_dkk=0.1),
-        HourlyPrice(start=five_minutes_ago - dt.timedelta(hours=4), price_kwh_dkk=0.1),
-        HourlyPrice(start=five_minutes_ago - dt.timedelta(hours=3), price_kwh_dkk=0.1),
-        HourlyPrice(start=five_minutes_ago - dt.timedelta(hours=2), price_kwh_dkk=1.0),
-        HourlyPrice(start=five_minutes_ago - dt.timedelta(hours=1), price_kwh_dkk=1.0),
-        # Make the hour that started 5 minutes ago the next best selection
-        HourlyPrice(start=five_minutes_ago, price_kwh_dkk=0.5),
-        HourlyPrice(start=five_minutes_ago + dt.timedelta(hours=1), price_kwh_dkk=1.0),
-        HourlyPrice(start=five_minutes_ago + dt.timedelta(hours=2), price_kwh_dkk=1.0),
-        HourlyPrice(start=five_minutes_ago + dt.timedelta(hours=3), price_kwh_dkk=1.0),
-    ]
+    # Make some hours in the past the cheapest, and the hour that started 5 minutes ago the next best selection
+    hourly_prices = make_hourly_prices(five_minutes_ago - dt.timedelta(hours=5),
+                                       [0.1, 0.1, 0.1, 1.0, 1.0, 0.5, 1.0, 1.0, 1.0])
 
     result = create_charging_plan(vehicle_90_percent, hourly_prices, ChargingRequest(battery_target=100, ready_by=None))
     assert result.success
@@ -212,7 +216,8 @@ def test_create_charging_plan_immediate_start(vehicle_90_percent: VehicleChargeS
     assert result.plan.start_time == five_minutes_ago
 
 
-def test_create_charging_plan_early_partial_start() -> None:
+def test_create_charging_plan_early_partial_start(make_hourly_prices: Callable[
+        [dt.datetime, List[float]], List[HourlyPrice]]) -> None:
     """
     Test that the charging plan will start early (partial hour) in the event that charging mostly in a given hour is
     optimal
@@ -221,15 +226,7 @@ def test_create_charging_plan_early_partial_start() -> None:
     # half of the second hour
     vehicle_state = vehicle_charge_state_required_for_charging_duration_to_full(1.5)
     now = dt.datetime.now().astimezone()
-    hourly_prices: List[HourlyPrice] = [
-        # Make some hours in the past the cheapest
-        HourlyPrice(start=now + dt.timedelta(hours=1), price_kwh_dkk=2),
-        HourlyPrice(start=now + dt.timedelta(hours=2), price_kwh_dkk=1.4),
-        HourlyPrice(start=now + dt.timedelta(hours=3), price_kwh_dkk=1.1),
-        HourlyPrice(start=now + dt.timedelta(hours=4), price_kwh_dkk=1.91),
-        HourlyPrice(start=now + dt.timedelta(hours=5), price_kwh_dkk=2),
-        HourlyPrice(start=now + dt.timedelta(hours=6), price_kwh_dkk=2),
-    ]
+    hourly_prices = make_hourly_prices(now + dt.timedelta(hours=1), [2, 1.4, 1.1, 1.91, 2, 2])
     result = create_charging_plan(vehicle_state, hourly_prices, ChargingRequest(battery_target=100, ready_by=None))
     assert result.success
     assert result.plan is not None
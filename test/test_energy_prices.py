@@ -1,15 +1,27 @@
+from typing import List
+
+import pytest
+
 from ladning.energy_prices import get_energy_prices
+from ladning.types import HourlyPrice
 import datetime as dt
 
 
-def test_get_energy_prices() -> None:
-    hourly_prices = get_energy_prices()
+@pytest.fixture(scope="session")
+def hourly_prices() -> List[HourlyPrice]:
+    """
+    Fetch the live energy prices once for the whole session - every test shares the snapshot instead of paying for
+    its own HTTPS round-trip
+    """
+    return get_energy_prices()
+
+
+def test_get_energy_prices(hourly_prices: List[HourlyPrice]) -> None:
     assert len(hourly_prices) > 0
-    for hourly_price in hourly_prices:
-        assert hourly_price.price_kwh_dkk > 0
+    assert min(p.price_kwh_dkk for p in hourly_prices) > 0
 
     # Check that earliest time is before now and later dates are after now
+    now = dt.datetime.now().astimezone()
     dates = [p.start for p in hourly_prices]
-    assert dates[0] < dt.datetime.now().astimezone()
-    for later_date in dates[1:]:
-        assert later_date > dt.datetime.now().astimezone()
+    assert dates[0] < now
+    assert all(later_date > now for later_date in dates[1:])
@@ -1,4 +1,3 @@
-import json
 from typing import List, Optional, Callable
 
 import datetime as dt
@@ -7,94 +6,83 @@ import pytest
 import requests
 
 from ladning.types import HourlyPrice, ChargingPlan, ChargingRequest, ChargingRequestResponse
-from ladning.webservice import LadningService
 
-# Use any free port for web services
-FREE_PORT = 0
-HOST_ADDRESS = "127.0.0.1"  # This has to be an IPv4 address for webservice to not break
+# Constant offsets used throughout the tests - no point rebuilding these timedeltas per invocation
+_HOUR = dt.timedelta(hours=1)
+_FIVE_HOURS = dt.timedelta(hours=5)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def hourly_price_getter() -> Callable[[], List[HourlyPrice]]:
-    def _func():
-        return [
-            HourlyPrice(dt.datetime.now().astimezone(), 1.32),
-            HourlyPrice(dt.datetime.now().astimezone() + dt.timedelta(hours=1), 2.5),
-        ]
+    # Precompute the sample prices once for the module - the getter hands out a fresh list per call, matching the
+    # production behavior of publishing a new list instance when prices change
+    prices = (HourlyPrice(dt.datetime.now().astimezone(), 1.32),
+              HourlyPrice(dt.datetime.now().astimezone() + _HOUR, 2.5))
+    return lambda: list(prices)
 
-    return _func
 
-
-@pytest.fixture
+@pytest.fixture(scope="module")
 def charging_plan_getter() -> Callable[[], Optional[ChargingPlan]]:
-    return lambda: ChargingPlan(dt.datetime.now().astimezone(), dt.datetime.now().astimezone() + dt.timedelta(hours=1),
-                                90, 100, 10.0, 120.0)
+    plan = ChargingPlan(dt.datetime.now().astimezone(), dt.datetime.now().astimezone() + _HOUR,
+                        90, 100, 10.0, 120.0)
+    return lambda: plan
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def charging_request_setter() -> Callable[[ChargingRequest], ChargingRequestResponse]:
     return lambda _: ChargingRequestResponse(success=True, reason="", plan=None)
 
 
-def test_webservice_query(hourly_price_getter: Callable[[], List[HourlyPrice]],
+def test_webservice_query(configure_service, http: requests.Session,
+                          hourly_price_getter: Callable[[], List[HourlyPrice]],
                           charging_plan_getter: Callable[[], Optional[ChargingPlan]],
                           charging_request_setter: Callable[[ChargingRequest], ChargingRequestResponse]) -> None:
     """
     Test that the "/electricity" API endpoint can be queried with HTTP GET and that it returns a charging plan and
     hourly pries
     """
-    with LadningService(host=HOST_ADDRESS, port=FREE_PORT, electricity_price_getter=hourly_price_getter,
-                        charging_plan_getter=charging_plan_getter,
-                        charging_request_setter=charging_request_setter) as service:
-        url = f"{service.endpoint}/electricity"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        results = resp.json()
-        assert results["charging_plan"] is not None
-        assert results["hourly_prices"] is not None
-        assert len(results["hourly_prices"]) == 2
-
-
-def test_webservice_charging_request(hourly_price_getter: Callable[[], List[HourlyPrice]],
-                                     charging_plan_getter: Callable[[], Optional[ChargingPlan]]) -> None:
+    service = configure_service(prices=hourly_price_getter, plan=charging_plan_getter,
+                                setter=charging_request_setter)
+    url = f"{service.endpoint}/electricity"
+    resp = http.get(url)
+    assert resp.status_code == 200, resp.text
+    results = resp.json()
+    assert results["charging_plan"] is not None
+    assert results["hourly_prices"] is not None
+    assert len(results["hourly_prices"]) == 2
+
+
+def _success_setter(req: ChargingRequest) -> ChargingRequestResponse:
+    return ChargingRequestResponse(success=True, reason="",
+                                   plan=ChargingPlan(dt.datetime.now().astimezone(),
+                                                     dt.datetime.now().astimezone() + _FIVE_HOURS,
+                                                     battery_start=50, battery_end=req.battery_target,
+                                                     total_cost_dkk=50.0,
+                                                     range_added_km=210.0))
+
+
+def _failure_setter(_: ChargingRequest) -> ChargingRequestResponse:
+    return ChargingRequestResponse(success=False, reason="It failed!", plan=None)
+
+
+@pytest.mark.parametrize("setter, expected_success, expected_reason",
+                         [(_success_setter, True, ""), (_failure_setter, False, "It failed!")])
+def test_webservice_charging_request(configure_service, http: requests.Session,
+                                     hourly_price_getter: Callable[[], List[HourlyPrice]],
+                                     charging_plan_getter: Callable[[], Optional[ChargingPlan]],
+                                     setter: Callable[[ChargingRequest], ChargingRequestResponse],
+                                     expected_success: bool, expected_reason: str) -> None:
     """
     Test that the "/charging_request" API endpoint can be called with HTTP POST and that it returns the result of the
     charging request
     """
-
-    def success(req: ChargingRequest) -> ChargingRequestResponse:
-        return ChargingRequestResponse(success=True, reason="",
-                                       plan=ChargingPlan(dt.datetime.now().astimezone(),
-                                                         dt.datetime.now().astimezone() + dt.timedelta(hours=5),
-                                                         battery_start=50, battery_end=req.battery_target,
-                                                         total_cost_dkk=50.0,
-                                                         range_added_km=210.0))
-
-    def failure(_: ChargingRequest) -> ChargingRequestResponse:
-        return ChargingRequestResponse(success=False, reason="It failed!", plan=None)
-
     request_data = dict(battery_target=100,
-                        ready_by=(dt.datetime.now().astimezone() + dt.timedelta(hours=5)).isoformat())
-    headers = {'Content-type': 'application/json'}
-
-    # Test success
-    with LadningService(host=HOST_ADDRESS, port=FREE_PORT, electricity_price_getter=hourly_price_getter,
-                        charging_plan_getter=charging_plan_getter, charging_request_setter=success) as service:
-        url = f"{service.endpoint}/charging_request"
-        resp = requests.post(url, json=request_data, headers=headers)
-        resp.raise_for_status()
-        results = resp.json()
-        assert results["success"] is True
-        assert results["reason"] == ""
-        assert results["plan"] is not None
-
-    # Test failure
-    with LadningService(host=HOST_ADDRESS, port=FREE_PORT, electricity_price_getter=hourly_price_getter,
-                        charging_plan_getter=charging_plan_getter, charging_request_setter=failure) as service:
-        url = f"{service.endpoint}/charging_request"
-        resp = requests.post(url, json=request_data, headers=headers)
-        resp.raise_for_status()
-        results = resp.json()
-        assert results["success"] is False
-        assert results["reason"] == "It failed!"
-        assert results["plan"] is None
+                        ready_by=(dt.datetime.now().astimezone() + _FIVE_HOURS).isoformat())
+
+    service = configure_service(prices=hourly_price_getter, plan=charging_plan_getter, setter=setter)
+    resp = http.post(f"{service.endpoint}/charging_request", json=request_data)
+    assert resp.status_code == 200, resp.text
+    results = resp.json()
+    assert results["success"] is expected_success
+    assert results["reason"] == expected_reason
+    assert (results["plan"] is not None) is expected_success